@@ -6,44 +6,46 @@ p.add_argument("-f", "--file", help="Filename", required=True)
 args = p.parse_args()
 
 def normalize(code, T=425):
-    normalized_code = []
-    frame = []
-    for i in range(len(code)):
-        period = round(code[i] / T)
-        if period > 8:
-            normalized_code.append(frame)
-            frame = []
-        else:
-            frame.append(period)
-    normalized_code.append(frame)
-    return normalized_code
+    # 四捨五入を整数演算で行う (c / T + 0.5 の切り捨て)
+    periods = [int((2 * c + T) // (2 * T)) for c in code]
+    # 8Tを超える区間(フレーム間の空白)でフレームを区切る
+    splits = [i for i, period in enumerate(periods) if period > 8]
+    bounds = zip([-1] + splits, splits + [len(periods)])
+    return [periods[start + 1 : end] for start, end in bounds]
+
+# (mark, space) の組を mark << 4 | space に詰めたものからビットへの対応
+PAIR_TO_BIT = {0x84: "", 0x11: "0", 0x13: "1"}
 
 def decode_to_binary(normalized_code):
     block = []
-    data_frame = ""
     for frame_index, frame in enumerate(normalized_code):
         # フレーム#1を無視し、フレーム#2のみを処理
         if frame_index == 0:
             continue
-        for i in range(0, len(frame) - 1, 2):
-            if frame[i] == 8 and frame[i + 1] == 4:
-                continue
-            elif frame[i] == 1 and frame[i + 1] == 1:
-                data_frame += "0"
-            elif frame[i] == 1 and frame[i + 1] == 3:
-                data_frame += "1"
-            else:
-                raise ValueError(f"Unable to decode at frame {frame_index}, position {i}. Values: {frame[i]}, {frame[i + 1]}")
+        pairs = list(zip(frame[::2], frame[1::2]))
+        try:
+            data_frame = "".join([PAIR_TO_BIT[(a << 4) | b] for a, b in pairs])
+        except KeyError:
+            i = next(i for i, (a, b) in enumerate(pairs) if (a << 4) | b not in PAIR_TO_BIT)
+            a, b = pairs[i]
+            raise ValueError(f"Unable to decode at frame {frame_index}, position {2 * i}. Values: {a}, {b}")
         block.append(data_frame)
-        data_frame = ""
 
     return block[0], len(block)
 
+# バイトのビット順を反転するテーブル (AEHAはLSBファーストで送られる)
+BITREV = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
 def parse_binary_code_as_hex(binary_code):
+    n_bytes = len(binary_code) // 8
+    body, tail = binary_code[: n_bytes * 8], binary_code[n_bytes * 8 :]
     hex_code = ""
-    while len(binary_code) > 0:
-        hex_code += "{:02x}".format(int(binary_code[7::-1], 2))
-        binary_code = binary_code[8:]
+    if body:
+        raw = int(body, 2).to_bytes(n_bytes, "big")
+        hex_code = raw.translate(BITREV).hex()
+    # 8ビットに満たない末尾もそのまま反転して出力する
+    if tail:
+        hex_code += "{:02x}".format(int(tail[::-1], 2))
     return hex_code
 
 with open(args.file, "r") as f:
@@ -54,7 +56,7 @@ for key, values in records.items():
     try:
         binary_code, n_frame = decode_to_binary(normalized_code)
         hex_code = parse_binary_code_as_hex(binary_code)
-        formatted_hex_code = ' '.join([str(hex_code)[i:i+2] for i in range(0, len(hex_code), 2)])
+        formatted_hex_code = bytes.fromhex(hex_code).hex(" ")
         print(f"{key}: {formatted_hex_code}")
     except ValueError as e:
         print(f"Error decoding {key}: {e}")
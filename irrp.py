@@ -26,10 +26,36 @@ gap        gap in milliseconds between transmitted codes, default 100 ms
 import time
 import json
 import os
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
 
 import pigpio  # http://abyz.co.uk/rpi/pigpio/python.html
 
 
+@lru_cache(maxsize=256)
+def _carrier(gpio, frequency, micros):
+    """
+   Generate carrier square wave.
+
+   The pulses only depend on the arguments, so they are cached
+   (as a tuple) across Playback calls.
+   """
+    wf = []
+    cycle = 1000.0 / frequency
+    cycles = int(round(micros / cycle))
+    on = int(round(cycle / 2.0))
+    sofar = 0
+    for c in range(cycles):
+        target = int(round((c + 1) * cycle))
+        sofar += on
+        off = target - sofar
+        sofar += off
+        wf.append(pigpio.pulse(1 << gpio, 0, on))
+        wf.append(pigpio.pulse(0, 1 << gpio, off))
+    return tuple(wf)
+
+
 class IRRP:
     def __init__(self,
                  file: str,
@@ -94,24 +120,6 @@ class IRRP:
         except:
             pass
 
-    def _carrier(self, gpio, frequency, micros):
-        """
-       Generate carrier square wave.
-       """
-        wf = []
-        cycle = 1000.0 / frequency
-        cycles = int(round(micros / cycle))
-        on = int(round(cycle / 2.0))
-        sofar = 0
-        for c in range(cycles):
-            target = int(round((c + 1) * cycle))
-            sofar += on
-            off = target - sofar
-            sofar += off
-            wf.append(pigpio.pulse(1 << gpio, 0, on))
-            wf.append(pigpio.pulse(0, 1 << gpio, off))
-        return wf
-
     def _normalise(self, c):
         """
        Typically a code will be made up of two or three distinct
@@ -149,33 +157,28 @@ class IRRP:
        """
         if self.VERBOSE:
             print("before normalise", c)
-        entries = len(c)
-        p = [0] * entries  # Set all entries not processed.
-        for i in range(entries):
-            if not p[i]:  # Not processed?
-                v = c[i]
-                tot = v
-                similar = 1.0
-
-                # Find all pulses with similar lengths to the start pulse.
-                for j in range(i + 2, entries, 2):
-                    if not p[j]:  # Unprocessed.
-                        if (c[j] * self.TOLER_MIN) < v < (
-                                c[j] * self.TOLER_MAX):  # Similar.
-                            tot = tot + c[j]
-                            similar += 1.0
-
-                # Calculate the average pulse length.
-                newv = round(tot / similar, 2)
-                c[i] = newv
+        for base in (0, 1):  # Marks, then spaces.
+
+            # Visit the pulses shortest first so that each group of
+            # similar pulses is a contiguous run of the sorted order.
+            order = sorted(range(base, len(c), 2), key=c.__getitem__)
+            entries = len(order)
+            i = 0
+            while i < entries:
+
+                # Grow the group while each pulse is similar to its
+                # shorter neighbour, break where there is a gap.
+                j = i + 1
+                while j < entries and (
+                        c[order[j]] < c[order[j - 1]] * self.TOLER_MAX):
+                    j += 1
 
                 # Set all similar pulses to the average value.
-                for j in range(i + 2, entries, 2):
-                    if not p[j]:  # Unprocessed.
-                        if (c[j] * self.TOLER_MIN) < v < (
-                                c[j] * self.TOLER_MAX):  # Similar.
-                            c[j] = newv
-                            p[j] = 1
+                group = order[i:j]
+                newv = round(sum(c[k] for k in group) / len(group), 2)
+                for k in group:
+                    c[k] = newv
+                i = j
 
         if self.VERBOSE:
             print("after normalise", c)
@@ -198,13 +201,11 @@ class IRRP:
         if len(p1) != len(p2):
             return False
 
-        for i in range(len(p1)):
-            v = p1[i] / p2[i]
-            if (v < self.TOLER_MIN) or (v > self.TOLER_MAX):
-                return False
+        if not all(self.TOLER_MIN <= a / b <= self.TOLER_MAX
+                   for a, b in zip(p1, p2)):
+            return False
 
-        for i in range(len(p1)):
-            p1[i] = int(round((p1[i] + p2[i]) / 2.0))
+        p1[:] = [int(round((a + b) / 2.0)) for a, b in zip(p1, p2)]
 
         if self.VERBOSE:
             print("after compare", p1)
@@ -213,18 +214,11 @@ class IRRP:
 
     def _tidy_mark_space(self, records, base):
 
-        ms = {}
-
         # Find all the unique marks (base=0) or spaces (base=1)
         # and count the number of times they appear,
 
-        for rec in records:
-            rl = len(records[rec])
-            for i in range(base, rl, 2):
-                if records[rec][i] in ms:
-                    ms[records[rec][i]] += 1
-                else:
-                    ms[records[rec][i]] = 1
+        ms = Counter(chain.from_iterable(
+            records[rec][base::2] for rec in records))
 
         if self.VERBOSE:
             print("t_m_s A", ms)
@@ -272,9 +266,7 @@ class IRRP:
             print("t_m_s B", ms)
 
         for rec in records:
-            rl = len(records[rec])
-            for i in range(base, rl, 2):
-                records[rec][i] = ms[records[rec][i]]
+            records[rec][base::2] = [ms[p] for p in records[rec][base::2]]
 
     def _tidy(self, records):
 
@@ -294,25 +286,26 @@ class IRRP:
 
         if level != pigpio.TIMEOUT:
 
-            edge = pigpio.tickDiff(self.last_tick, tick)
+            edge = (tick - self.last_tick) & 0xFFFFFFFF  # pigpio.tickDiff
             self.last_tick = tick
 
-            if self.fetching_code:
-
-                if (edge > self.PRE_US) and (
-                        not self.in_code):  # Start of a code.
-                    self.in_code = True
-                    self.pi.set_watchdog(self.GPIO,
-                                         self.POST_MS)  # Start watchdog.
+            if not self.fetching_code:
+                return
 
-                elif (edge > self.POST_US) and self.in_code:  # End of a code.
+            # Most edges arrive mid-code, so test for that first.
+            if self.in_code:
+                if edge > self.POST_US:  # End of a code.
                     self.in_code = False
                     self.pi.set_watchdog(self.GPIO, 0)  # Cancel watchdog.
                     self._end_of_code()
-
-                elif self.in_code:
+                else:
                     self.code.append(edge)
 
+            elif edge > self.PRE_US:  # Start of a code.
+                self.in_code = True
+                self.pi.set_watchdog(self.GPIO,
+                                     self.POST_MS)  # Start watchdog.
+
         else:
             self.pi.set_watchdog(self.GPIO, 0)  # Cancel watchdog.
             if self.in_code:
@@ -396,31 +389,38 @@ class IRRP:
 
         self._backup(FILE)
 
+        # One record per line, written as we go rather than building
+        # the whole file in memory.
         f = open(FILE, "w")
-        f.write(
-            json.dumps(records, sort_keys=True).replace("],", "],\n") + "\n")
+        f.write("{")
+        for i, key in enumerate(sorted(records)):
+            if i:
+                f.write(",\n ")
+            f.write("{}: {}".format(json.dumps(key), json.dumps(records[key])))
+        f.write("}\n")
         f.close()
         self.pi.stop()  # Disconnect from Pi.
 
-    def Playback(self, GPIO:int, ID:int, file:str="", file_object:str=""):  # Playback.
+    def Playback(self, GPIO:int, ID:int, file:str="", file_object:str="", records:dict=None):  # Playback.
 
         self.pi = pigpio.pi()  # Connect to Pi.
 
-        if file:
-            FILE = file
-        elif file_object:
-            records = json.loads(file_object)
-        else:
-            FILE = self.FILE
-            try:
-                f = open(FILE, "r")
-            except:
-                print("Can't open: {}".format(FILE))
-                exit(0)
+        if records is None:  # Not already decoded, load from JSON.
+            if file:
+                FILE = file
+            elif file_object:
+                records = json.loads(file_object)
+            else:
+                FILE = self.FILE
+                try:
+                    f = open(FILE, "r")
+                except:
+                    print("Can't open: {}".format(FILE))
+                    exit(0)
 
-            records = json.load(f)
+                records = json.load(f)
 
-            f.close()
+                f.close()
 
         self.pi.set_mode(GPIO, pigpio.OUTPUT)  # IR TX connected to this GPIO.
 
@@ -446,21 +446,21 @@ class IRRP:
                 marks_wid = {}
                 spaces_wid = {}
 
-                wave = [0] * len(self.code)
+                marks = self.code[0::2]
+                spaces = self.code[1::2]
 
-                for i in range(0, len(self.code)):
-                    ci = self.code[i]
-                    if i & 1:  # Space
-                        if ci not in spaces_wid:
-                            self.pi.wave_add_generic([pigpio.pulse(0, 0, ci)])
-                            spaces_wid[ci] = self.pi.wave_create()
-                        wave[i] = spaces_wid[ci]
-                    else:  # Mark
-                        if ci not in marks_wid:
-                            wf = self._carrier(GPIO, self.FREQ, ci)
-                            self.pi.wave_add_generic(wf)
-                            marks_wid[ci] = self.pi.wave_create()
-                        wave[i] = marks_wid[ci]
+                for m in dict.fromkeys(marks):  # Unique, in order.
+                    wf = _carrier(GPIO, self.FREQ, m)
+                    self.pi.wave_add_generic(wf)
+                    marks_wid[m] = self.pi.wave_create()
+
+                for s in dict.fromkeys(spaces):
+                    self.pi.wave_add_generic([pigpio.pulse(0, 0, s)])
+                    spaces_wid[s] = self.pi.wave_create()
+
+                wave = [0] * len(self.code)
+                wave[0::2] = [marks_wid[m] for m in marks]
+                wave[1::2] = [spaces_wid[s] for s in spaces]
 
                 delay = emit_time - time.time()
 
@@ -1,12 +1,31 @@
 #!/usr/bin/env python3
 
 from irrp import IRRP
-import json
-import io
 import argparse
+from functools import lru_cache
+from itertools import chain
 
 
 FRAME0 = "0100000000000100000001110010000000000000000000000000000001100000"
+FRAME0_BYTES = bytes(int(FRAME0[i : i + 8][::-1], 2) for i in range(0, len(FRAME0), 8))
+
+# byte #6-1 : mode
+MODE = {"auto": "0", "fan": "1", "dry": "2", "cool": "3", "heat": "4"}
+
+# byte #6-2 : power
+POWER = {"off": "0", "on": "1"}
+
+# byte #9-1 : strength
+STRENGTH = {"1": "3", "2": "4", "3": "5", "4": "7", "auto": "a", "quiet": "3"}
+
+# byte #9-2 : direction
+DIRECTION = {"1": "1", "2": "2", "3": "3", "4": "4", "5": "5", "auto": "f"}
+
+def _lookup(table: dict, name: str, value: str):
+    try:
+        return table[value]
+    except KeyError:
+        raise ValueError(f"{name} must be one of {'/'.join(table)}") from None
 
 def encode_panasonic_aircon(
     power: str,
@@ -16,101 +35,75 @@ def encode_panasonic_aircon(
     direction: str = "auto",
     powerful: str = "off",
 ):
-    # byte #1,2,3,4,5 : fixed
-    data = "0220e00400"
-
-    # byte #6-1 : mode
-    match mode:
-        case "auto":
-            data += "0"
-        case "fan":
-            data += "1"
-        case "dry":
-            data += "2"
-        case "cool":
-            data += "3"
-        case "heat":
-            data += "4"
-
-    # byte #6-2 : power
-    match power:
-        case "off":
-            data += "0"
-        case "on":
-            data += "1"
-
     # byte #7 : temp
-    if 16 <= temp <= 30:
-        data += format(temp * 2, "02x")
-    else:
+    if not 16 <= temp <= 30:
         raise ValueError("Temperature must be between 16 and 30")
 
-    # byte #8 : fixed
-    data += "80"
-
-    # byte #9-1 : strength
-    match strength:
-        case "1":
-            data += "3"
-        case "2":
-            data += "4"
-        case "3":
-            data += "5"
-        case "4":
-            data += "7"
-        case "auto":
-            data += "a"
-        case "quiet":
-            data += "3"
-
-    # byte #9-2 : direction
-    match direction:
-        case "1":
-            data += "1"
-        case "2":
-            data += "2"
-        case "3":
-            data += "3"
-        case "4":
-            data += "4"
-        case "5":
-            data += "5"
-        case "auto":
-            data += "f"
-
-    # byte #10,11,12,13 : fixed
-    data += "00000660"
-
     # byte #14 : quiet or pwerful
     if strength == "quiet" and powerful == "off":
-        data += "20"
+        quiet_or_powerful = "20"
     elif powerful == "on":
-        data += "01"
+        quiet_or_powerful = "01"
     else:
-        data += "00"
-
-    # byte #15,16,17 : fixed
-    data += "008000"
+        quiet_or_powerful = "00"
 
     # byte #18 : auto
     if strength == "auto" and mode != "heat":
-        data += "16"
+        auto = "16"
     else:
-        data += "06"
+        auto = "06"
+
+    data = "".join([
+        "0220e00400",                                # byte #1,2,3,4,5 : fixed
+        _lookup(MODE, "Mode", mode),                 # byte #6-1 : mode
+        _lookup(POWER, "Power", power),              # byte #6-2 : power
+        format(temp * 2, "02x"),                     # byte #7 : temp
+        "80",                                        # byte #8 : fixed
+        _lookup(STRENGTH, "Strength", strength),     # byte #9-1 : strength
+        _lookup(DIRECTION, "Direction", direction),  # byte #9-2 : direction
+        "00000660",                                  # byte #10,11,12,13 : fixed
+        quiet_or_powerful,                           # byte #14 : quiet or powerful
+        "008000",                                    # byte #15,16,17 : fixed
+        auto,                                        # byte #18 : auto
+    ])
 
     # byte #19 : checksum
-    data += "{:02x}".format(sum(int(data[i : i + 2], 16) for i in range(0, len(data), 2)) % 256)
+    data += "{:02x}".format(sum(bytes.fromhex(data)) & 0xFF)
 
     return data
 
-# リモコン信号のhexからAEHAフォーマット準拠のバイナリデータを生成する
-def encode_aeha_hex_to_bin(encoded_hex):
-    bin_data = ""
-    while len(encoded_hex) > 0:
-        byte = "{:08b}".format(int(encoded_hex[:2], 16))
-        bin_data += byte[::-1]
-        encoded_hex = encoded_hex[2:]
-    return bin_data
+# hexをバイト列に変換する (奇数桁の場合、末尾の1桁も1バイトとして扱う)
+def _hex_to_bytes(encoded_hex: str):
+    if len(encoded_hex) % 2:
+        return bytes.fromhex(encoded_hex[:-1]) + bytes([int(encoded_hex[-1], 16)])
+    return bytes.fromhex(encoded_hex)
+
+# unit_time ごとに各バイト値(LSBファースト)のON/OFFパターンを求めておく
+@lru_cache(maxsize=8)
+def _byte_pulses(unit_time: int):
+    table = []
+    for b in range(256):
+        pulses = []
+        for i in range(8):
+            if (b >> i) & 1:
+                pulses.extend([unit_time, unit_time * 3])
+            else:
+                pulses.extend([unit_time, unit_time])
+        table.append(tuple(pulses))
+    return table
+
+# リーダーとデータ部からなるAEHAフレーム1つ分のON/OFFパターンを生成する
+def _aeha_frame(data: bytes, unit_time: int):
+    byte_pulses = _byte_pulses(unit_time)
+    return [
+        unit_time * 8, unit_time * 4,
+        *chain.from_iterable(map(byte_pulses.__getitem__, data)),
+    ]
+
+# 固定のフレーム#1(FRAME0)のON/OFFパターン
+@lru_cache(maxsize=8)
+def _frame0_pulses(unit_time: int):
+    return tuple(_aeha_frame(FRAME0_BYTES, unit_time))
 
 # バイナリデータから赤外線LEDのON/OFFパターンを生成する
 def encode_ir_signal(
@@ -120,48 +113,21 @@ def encode_ir_signal(
     repeat: int = 1,
 ):
     if format == "AEHA":
-        bin_data = encode_aeha_hex_to_bin(encoded_hex)
-        unit_frame = [unit_time * 8, unit_time * 4]
-        for b in bin_data:
-            if b == "0":
-                unit_frame.extend([unit_time, unit_time])
-            else:
-                unit_frame.extend([unit_time, unit_time * 3])
-        frame = []
-        for i in range(repeat):
-            frame += unit_frame
-            frame += [unit_time, unit_time * 30]
-        return frame
+        data = _hex_to_bytes(encoded_hex)
+        return [
+            *_aeha_frame(data, unit_time), unit_time, unit_time * 30,
+        ] * repeat
 
     if format == "Panasonic":
-        unit_frame0 = [unit_time * 8, unit_time * 4]
-        for b in FRAME0:
-            if b == "0":
-                unit_frame0.extend([unit_time, unit_time])
-            else:
-                unit_frame0.extend([unit_time, unit_time * 3])
-
-        bin_data = encode_aeha_hex_to_bin(encoded_hex)
-        unit_frame1 = [unit_time * 8, unit_time * 4]
-        for b in bin_data:
-            if b == "0":
-                unit_frame1.extend([unit_time, unit_time])
-            else:
-                unit_frame1.extend([unit_time, unit_time * 3])
-
-        frame = []
-        for i in range(repeat):
-            frame += unit_frame0
-            frame += [unit_time, unit_time * 8]
-            frame += unit_frame1
-            frame += [unit_time, unit_time * 20]
-        return frame
+        data = _hex_to_bytes(encoded_hex)
+        return [
+            *_frame0_pulses(unit_time), unit_time, unit_time * 8,
+            *_aeha_frame(data, unit_time), unit_time, unit_time * 20,
+        ] * repeat
 
 def ir_send(decoded_code: str, led_pin: int = 17):
-    ir_code_json = io.StringIO(json.dumps({"ir_code": decoded_code}))
-    ir_code_json = json.dumps({"ir_code": decoded_code})
     ir = IRRP(file="/dev/null", no_confirm=True)
-    ir.Playback(GPIO=led_pin, ID="ir_code", file_object=ir_code_json)
+    ir.Playback(GPIO=led_pin, ID="ir_code", records={"ir_code": decoded_code})
     ir.stop()
 
 def control_aircon(